@@ -7,6 +7,7 @@
 
 import fitz  # PyMuPDF
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # File path
 input_pdf_path = (
@@ -81,35 +82,71 @@ def book_to_pdf(book_page):
     return book_page + offset - 1  # 0-indexed
 
 
-# Create output directory
-os.makedirs("chapters", exist_ok=True)
+# Raw PDF bytes loaded once per worker process so each extraction can open an
+# in-memory copy without touching the disk again (fitz documents can't be
+# pickled, so the bytes are the cheapest thing to share).
+_worker_pdf_bytes = None
 
-# Loop through all chapters and their subchapters
-for chapter, subchapters in chapters.items():
-    chapter_dir = os.path.join("chapters", chapter)
-    os.makedirs(chapter_dir, exist_ok=True)
 
-    for i, (sub_name, start_book_page) in enumerate(subchapters):
-        # Determine end page (start of next subchapter or end of doc)
-        if i + 1 < len(subchapters):
-            end_book_page = subchapters[i + 1][1]
+def _init_worker(path):
+    global _worker_pdf_bytes
+    with open(path, "rb") as f:
+        _worker_pdf_bytes = f.read()
+
+
+# Extraction of a single subchapter. select() mutates the document, so each
+# task opens a fresh copy from the worker's cached bytes, keeps just its page
+# range, and saves — no second document or cross-document xref merging as with
+# insert_pdf.
+def extract_subchapter(start_pdf_page, end_pdf_page, out_path):
+    sub_doc = fitz.open("pdf", _worker_pdf_bytes)
+    sub_doc.select(list(range(start_pdf_page, end_pdf_page + 1)))
+    sub_doc.save(out_path)
+    sub_doc.close()
+
+
+def main():
+    # Create output directory
+    os.makedirs("chapters", exist_ok=True)
+
+    # Pre-compute every subchapter's page range and output path
+    tasks = []  # (start_pdf_page, end_pdf_page, out_path)
+    chapter_items = list(chapters.items())
+    for ci, (chapter, subchapters) in enumerate(chapter_items):
+        chapter_dir = os.path.join("chapters", chapter)
+        os.makedirs(chapter_dir, exist_ok=True)
+
+        # Where the last subchapter ends: first subchapter of the next chapter,
+        # or the end of the document for the final chapter
+        if ci + 1 < len(chapter_items):
+            chapter_end_book_page = chapter_items[ci + 1][1][0][1]
         else:
-            # If last subchapter, guess or slice until next chapter (or end of file)
-            next_chapter_index = list(chapters.keys()).index(chapter) + 1
-            if next_chapter_index < len(chapters):
-                next_chapter = list(chapters.keys())[next_chapter_index]
-                end_book_page = chapters[next_chapter][0][1]
+            chapter_end_book_page = doc.page_count - offset + 1
+
+        for i, (sub_name, start_book_page) in enumerate(subchapters):
+            # Determine end page (start of next subchapter or end of chapter)
+            if i + 1 < len(subchapters):
+                end_book_page = subchapters[i + 1][1]
             else:
-                end_book_page = doc.page_count - offset + 1  # to end of doc
+                end_book_page = chapter_end_book_page
+
+            start_pdf_page = book_to_pdf(start_book_page)
+            end_pdf_page = book_to_pdf(end_book_page) - 1
+
+            out_path = os.path.join(chapter_dir, f"{sub_name}.pdf")
+            tasks.append((start_pdf_page, end_pdf_page, out_path))
+
+    # Subchapters are independent, so extract them in parallel across processes
+    starts, ends, out_paths = zip(*tasks)
+    with ProcessPoolExecutor(
+        max_workers=min(os.cpu_count(), 8),
+        initializer=_init_worker,
+        initargs=(input_pdf_path,),
+    ) as executor:
+        list(executor.map(extract_subchapter, starts, ends, out_paths))
 
-        start_pdf_page = book_to_pdf(start_book_page)
-        end_pdf_page = book_to_pdf(end_book_page) - 1
+    print("✅ Finished splitting PDF into chapters and subchapters!")
 
-        # Extract subchapter pages
-        sub_doc = fitz.open()
-        sub_doc.insert_pdf(doc, from_page=start_pdf_page, to_page=end_pdf_page)
-        out_path = os.path.join(chapter_dir, f"{sub_name}.pdf")
-        sub_doc.save(out_path)
-        sub_doc.close()
 
-print("✅ Finished splitting PDF into chapters and subchapters!")
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,29 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
-#     "nbformat",
 #     "pathspec>=0.12.1",
 #     "typer",
 # ]
 # ///
 
-import textwrap
-from dataclasses import dataclass, field
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Iterator
 
-import nbformat
 import pathspec
 import typer
 
 
-@dataclass(order=True)
+@dataclass
 class FileInfo:
     line_count: int
     path: Path
-    content: str = field(default="", compare=False)
+    rel_path: str = ""
+    content_bytes: bytes = b""
 
     def __str__(self) -> str:
         return f"{self.path} ({self.line_count} lines)"
@@ -32,18 +34,91 @@ def get_default_output_path(root_dir: Path) -> Path:
     return root_dir / f"{root_dir.resolve().name}-llms.log"
 
 
-def read_file_content(file_path: Path) -> str:
-    """Read and potentially clean file content based on file type."""
+def clean_notebook_content(content: str) -> str:
+    """Strip outputs, execution counts and metadata from notebook JSON.
+
+    Operates on the JSON directly; an nbformat parse/validate/serialize
+    roundtrip is far slower and unnecessary since the result is only dumped
+    for the LLM, never read back as a notebook.
+    """
+    try:
+        nb = json.loads(content)
+        if not isinstance(nb, dict):
+            return content
+        for cell in nb.get("cells", []):
+            if not isinstance(cell, dict):
+                continue
+            if cell.get("cell_type") == "code":
+                cell["outputs"] = []
+                cell["execution_count"] = None
+            cell["metadata"] = {}
+        nb["metadata"] = {}
+        return json.dumps(nb, ensure_ascii=False)
+    except (json.JSONDecodeError, TypeError):
+        return content
+
+
+def read_file_content(file_path: Path) -> bytes:
+    """Read and potentially clean file content based on file type.
+
+    A small prefix is sampled first so binary files (.pdf, .png, ...) that
+    slip through the ignore rules are skipped without reading and decoding the
+    whole file. Returns the file's UTF-8 bytes (validated once here) so the
+    output path can write them without re-encoding.
+    """
     try:
-        return file_path.read_text(encoding="utf-8")
+        with file_path.open("rb") as f:
+            sample = f.read(4096)
+            if b"\x00" in sample:
+                return b""
+            try:
+                sample.decode("utf-8")
+            except UnicodeDecodeError as e:
+                # A multi-byte character split at the sample boundary is fine;
+                # an error earlier in the sample means binary content
+                if e.start < len(sample) - 3:
+                    return b""
+            data = sample + f.read()
+        if file_path.suffix == ".ipynb":
+            return clean_notebook_content(data.decode("utf-8")).encode("utf-8")
+        data.decode("utf-8")  # validate once; the raw bytes are what we keep
+        return data
     except (UnicodeDecodeError, PermissionError, OSError) as e:
         typer.echo(f"Failed to read {file_path}: {e}", err=True)
-        return ""
+        return b""
+
+
+# Rough upper bound used to decide when a file is big enough to possibly
+# exceed the line limit without reading it
+AVG_BYTES_PER_LINE = 400
+
 
+def exceeds_max_lines(file_path: Path, max_lines: int) -> bool:
+    """Cheaply check whether a file has more than max_lines lines.
 
+    Files small enough to be under the limit are never opened; larger ones get
+    a chunked binary newline count that short-circuits as soon as the limit is
+    passed, avoiding the full read and UTF-8 decode entirely.
+    """
+    try:
+        if file_path.stat().st_size <= max_lines * AVG_BYTES_PER_LINE:
+            return False
+        newlines = 0
+        with file_path.open("rb") as f:
+            while chunk := f.read(65536):
+                newlines += chunk.count(b"\n")
+                if newlines > max_lines:
+                    return True
+    except OSError:
+        pass
+    return False
+
+
+@functools.lru_cache(maxsize=1)
 def get_ignore_spec(
     ignore_file_path: Path = Path(__file__).parent / ".ignore",
 ) -> pathspec.PathSpec:
+    """Compile the ignore spec once; the patterns don't change within a run."""
     try:
         if ignore_file_path.exists():
             with ignore_file_path.open("r") as f:
@@ -59,6 +134,39 @@ def get_ignore_spec(
     return pathspec.PathSpec.from_lines("gitwildmatch", [])
 
 
+def walk_files(root_dir: Path, ignore_spec: pathspec.PathSpec) -> Iterator[Path]:
+    """Yield files under root_dir, pruning ignored directories entirely.
+
+    Unlike rglob, matching directories against the ignore spec before
+    descending means junk trees (.git, node_modules, .venv, ...) are never
+    stat'd at all.
+    """
+    stack = [str(root_dir)]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError as e:
+            typer.echo(f"Warning: Couldn't scan {current}: {e}", err=True)
+            continue
+        for entry in entries:
+            if ignore_spec.match_file(entry.path):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                # Directory-only patterns (e.g. "node_modules/") need the
+                # trailing slash to match
+                if ignore_spec.match_file(entry.path + "/"):
+                    continue
+                stack.append(entry.path)
+            elif entry.is_file():
+                # Follow symlinks here so links to regular files are included,
+                # matching the old rglob + is_file() behaviour
+                # Zero-byte files can't contribute any lines; DirEntry.stat
+                # is nearly free since scandir already fetched the metadata
+                if entry.stat().st_size > 0:
+                    yield Path(entry.path)
+
+
 def collect_files(
     root_dir: Path,
     max_lines: int | None = None,
@@ -69,20 +177,34 @@ def collect_files(
     filtered_count = 0
     extension_filtered_count = 0
 
-    for path in root_dir.rglob("*"):
-        if ignore_spec.match_file(str(path)):
-            continue
-        if not path.is_file():
-            continue
-
+    paths = []
+    for path in walk_files(root_dir, ignore_spec):
         # Skip files with excluded extensions
         if exclude_extensions and path.suffix.lower() in exclude_extensions:
             extension_filtered_count += 1
             continue
 
+        # Drop obviously oversized files before paying for a full read
+        if max_lines is not None and exceeds_max_lines(path, max_lines):
+            filtered_count += 1
+            continue
+
+        paths.append(path)
+
+    # Reads are I/O-bound (the GIL is released during the read), so overlap
+    # them with a thread pool
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        contents = list(executor.map(read_file_content, paths))
+
+    for path, content in zip(paths, contents):
         try:
-            content = read_file_content(path)
-            line_count = len(content.splitlines()) if content else 0
+            # Count newlines in place instead of materializing a list of lines
+            line_count = (
+                content.count(b"\n") + (0 if content.endswith(b"\n") else 1)
+                if content
+                else 0
+            )
 
             # Skip files with too many lines if max_lines is set
             if max_lines is not None and line_count > max_lines:
@@ -91,7 +213,12 @@ def collect_files(
 
             if line_count > 0:
                 files.append(
-                    FileInfo(line_count=line_count, path=path, content=content)
+                    FileInfo(
+                        line_count=line_count,
+                        path=path,
+                        rel_path=str(path.relative_to(root_dir)),
+                        content_bytes=content,
+                    )
                 )
         except Exception as e:
             typer.echo(f"Warning: Couldn't process {path}: {e}", err=True)
@@ -103,26 +230,31 @@ def collect_files(
     if extension_filtered_count > 0:
         typer.echo(f"Filtered out {extension_filtered_count} files by extension")
 
-    return sorted(files, reverse=True)
+    return files
 
 
-def write_output_file(files: list[FileInfo], output_path: Path, root_dir: Path) -> None:
+def write_output_file(files: list[FileInfo], output_path: Path) -> None:
     files = sorted(files, key=lambda file_info: file_info.path)
-    with output_path.open("w", encoding="utf-8") as out:
-        out.write("<files>\n")
+    # Binary mode with a large buffer: the content bytes were validated as
+    # UTF-8 when read, so they go straight to disk without a re-encode pass,
+    # and writes reach the OS in large chunks
+    with output_path.open("wb", buffering=1024 * 1024) as out:
+        out.write(b"<files>\n")
         for file_info in files:
-            relative_path = file_info.path.relative_to(root_dir)
-            content = read_file_content(file_info.path)
+            content = file_info.content_bytes
             if content:
-                file_block = (
-                    f"<file>\n"
-                    f"  <path>{relative_path}</path>\n"
-                    f"  <content>\n{textwrap.indent(content, '    ')}\n"
-                    f"  </content>\n"
-                    f"</file>\n"
+                # bytes.replace is a single C-level pass; textwrap.indent
+                # re-scanned the content line by line (twice, with the outer
+                # indent), so build the block with the full indent baked in
+                indented = b"      " + content.replace(b"\n", b"\n      ")
+                out.write(
+                    b"  <file>\n    <path>"
+                    + file_info.rel_path.encode("utf-8")
+                    + b"</path>\n    <content>\n"
+                    + indented
+                    + b"\n    </content>\n  </file>\n"
                 )
-                out.write(textwrap.indent(file_block, "  "))
-        out.write("</files>")
+        out.write(b"</files>")
 
 
 def main(
@@ -176,7 +308,7 @@ def main(
 
     if dry:
         typer.echo("Dry run, listing files that would be included:\n")
-        for file_info in files:
+        for file_info in sorted(files, key=lambda fi: fi.line_count, reverse=True):
             typer.echo(file_info)
         typer.echo(f"\nTotal lines: {total_lines}")
         typer.echo(f"Total files: {len(files)}")
@@ -190,7 +322,7 @@ def main(
         return
     else:
         typer.echo(f"Writing {len(files)} files with {total_lines} lines to {output}")
-        write_output_file(files, Path(output), root_dir)
+        write_output_file(files, Path(output))
 
 
 if __name__ == "__main__":